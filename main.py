@@ -1,12 +1,27 @@
 import os
-import tempfile
-import requests
+import re
+import html
+import time
 import asyncio
-import threading
 import logging
+from collections import defaultdict
+import aiohttp
+import aiosqlite
 from mega import Mega
+from mega.crypto import a32_to_str, base64_to_a32, base64_url_decode, decrypt_attr
+from mega.errors import RequestError
+from Crypto.Cipher import AES
+from Crypto.Util import Counter
+from tenacity import (
+    AsyncRetrying,
+    retry_if_exception_type,
+    stop_after_attempt,
+    wait_exponential
+)
 from telegram import Update, constants
+from telegram.error import NetworkError, RetryAfter, TelegramError
 from telegram.ext import (
+    AIORateLimiter,
     Application,
     CommandHandler,
     ContextTypes,
@@ -30,83 +45,352 @@ WELCOME_ANIMATION_URL = os.getenv(
 )
 DOCUMENT_AS_FILE = os.getenv("DOCUMENT_AS_FILE", "True").lower() == "true"
 USE_THUMBNAIL = os.getenv("USE_THUMBNAIL", "True").lower() == "true"
+ADMIN_DB_PATH = os.getenv("ADMIN_DB_PATH", "admins.db")
+
+# In-memory admin storage: user_id -> role ('main' or 'regular').
+# Only the main admin can manage other admins. The rendered regular-admin
+# list is memoized and invalidated on mutation.
+_admins = {MAIN_ADMIN_ID: 'main'}
+_admins_rendered = None
+_admin_lock = asyncio.Lock()  # Guards mutations under concurrent updates
+
+def is_admin(user_id):
+    """O(1) membership check against the single admin table"""
+    return user_id in _admins
+
+def render_admins():
+    """Comma-separated regular-admin list, memoized until add/remove"""
+    global _admins_rendered
+    if _admins_rendered is None:
+        regulars = [str(uid) for uid, role in _admins.items() if role == 'regular']
+        _admins_rendered = ', '.join(regulars) if regulars else 'None'
+    return _admins_rendered
+
+# Admin persistence: the in-memory dict stays authoritative for reads;
+# mutations are written behind to SQLite so restarts keep granted admins
+_db = None
+
+async def init_admin_db():
+    """Open the admin DB and load persisted admins into memory"""
+    global _db, _admins_rendered
+    _db = await aiosqlite.connect(ADMIN_DB_PATH)
+    await _db.execute(
+        "CREATE TABLE IF NOT EXISTS admins (user_id INTEGER PRIMARY KEY, role TEXT)"
+    )
+    await _db.commit()
+    async with _db.execute("SELECT user_id, role FROM admins") as cursor:
+        async for user_id, role in cursor:
+            if user_id != MAIN_ADMIN_ID:
+                _admins[user_id] = role
+    _admins_rendered = None
+    logger.info(f"Loaded {len(_admins) - 1} persisted admins from {ADMIN_DB_PATH}")
+
+async def close_admin_db():
+    """Flush and close the admin DB on shutdown"""
+    global _db
+    if _db is not None:
+        await _db.close()
+        _db = None
+
+async def _persist_grant(user_id):
+    try:
+        await _db.execute(
+            "INSERT OR REPLACE INTO admins (user_id, role) VALUES (?, 'regular')",
+            (user_id,)
+        )
+        await _db.commit()
+    except Exception as e:
+        logger.error(f"Failed to persist admin {user_id}: {str(e)}")
+
+async def _persist_revoke(user_id):
+    try:
+        await _db.execute("DELETE FROM admins WHERE user_id = ?", (user_id,))
+        await _db.commit()
+    except Exception as e:
+        logger.error(f"Failed to persist admin removal {user_id}: {str(e)}")
+
+async def grant_admin(user_id):
+    """Add a regular admin and invalidate the rendered list"""
+    global _admins_rendered
+    async with _admin_lock:
+        _admins[user_id] = 'regular'
+        _admins_rendered = None
+    if _db is not None:
+        asyncio.create_task(_persist_grant(user_id))
+
+async def revoke_admin(user_id):
+    """Remove a regular admin and invalidate the rendered list"""
+    global _admins_rendered
+    async with _admin_lock:
+        _admins.pop(user_id, None)
+        _admins_rendered = None
+    if _db is not None:
+        asyncio.create_task(_persist_revoke(user_id))
+
+# Shared HTTP session for all Mega/Gofile traffic
+_http_session = None
+
+async def get_http_session():
+    """Return the shared aiohttp session, creating it on first use.
+    Keep-alive and DNS caching mean repeat Mega/Gofile calls skip the
+    TCP+TLS handshake instead of paying it per request"""
+    global _http_session
+    if _http_session is None or _http_session.closed:
+        _http_session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(
+                limit=64,
+                ttl_dns_cache=300,
+                keepalive_timeout=60
+            )
+        )
+    return _http_session
+
+async def close_http_session():
+    """Close the shared session and its pooled connections on shutdown"""
+    global _http_session
+    if _http_session is not None and not _http_session.closed:
+        await _http_session.close()
+    _http_session = None
+
+# Gofile upload-server cache; one lookup per TTL instead of per upload
+_GOFILE_SERVER_TTL = 300
+_gofile_server = {'name': None, 'ts': 0.0}
+
+async def get_gofile_server():
+    """Return a Gofile upload server name, cached for a few minutes"""
+    if _gofile_server['name'] and time.monotonic() - _gofile_server['ts'] < _GOFILE_SERVER_TTL:
+        return _gofile_server['name']
+    session = await get_http_session()
+    logger.info("Fetching Gofile server info...")
+    async with session.get(
+        "https://api.gofile.io/servers",
+        timeout=aiohttp.ClientTimeout(total=10)
+    ) as resp:
+        resp.raise_for_status()
+        data = await resp.json()
+    _gofile_server['name'] = data["data"]["servers"][0]["name"]
+    _gofile_server['ts'] = time.monotonic()
+    logger.info(f"Using Gofile server: {_gofile_server['name']}")
+    return _gofile_server['name']
+
+def invalidate_gofile_server():
+    """Force a fresh server pick on the next upload"""
+    _gofile_server['name'] = None
+
+def resolve_mega_file(mega, mega_link):
+    """Resolve a public Mega link into (name, size, cdn_url, decryptor)"""
+    file_id, file_key = mega._parse_url(mega_link).split('!')
+    key = base64_to_a32(file_key)
+    k = (key[0] ^ key[4], key[1] ^ key[5], key[2] ^ key[6], key[3] ^ key[7])
+    iv = key[4:6] + (0, 0)
+
+    file_data = mega._api_request({'a': 'g', 'g': 1, 'p': file_id})
+    if 'g' not in file_data:
+        raise Exception("File not accessible on Mega (removed or blocked)")
+
+    attribs = decrypt_attr(base64_url_decode(file_data['at']), k)
+    counter = Counter.new(128, initial_value=((iv[0] << 32) + iv[1]) << 64)
+    decryptor = AES.new(a32_to_str(k), AES.MODE_CTR, counter=counter)
+    return attribs['n'], file_data['s'], file_data['g'], decryptor
+
+class ProgressReporter:
+    """Coalesces progress updates into occasional status-message edits.
+
+    Transfer code just assigns latest_pct (no await); one background
+    task decides when an edit is actually worth a Telegram API call:
+    at least a 10% jump, or any change older than 5 seconds."""
+
+    def __init__(self, status_msg, caption):
+        self.status_msg = status_msg
+        self.caption = caption
+        self.latest_pct = 0
+        self.last_sent_pct = -1
+        self.last_sent_ts = 0.0
 
-# In-memory admin storage
-ADMINS = {MAIN_ADMIN_ID}  # Only main admin can manage other admins
-ADDITIONAL_ADMINS = set()  # Regular admins who can use the bot
+    async def run(self):
+        while True:
+            await asyncio.sleep(2)
+            pct = self.latest_pct
+            now = time.monotonic()
+            if pct == self.last_sent_pct:
+                continue
+            if abs(pct - self.last_sent_pct) < 10 and now - self.last_sent_ts <= 5:
+                continue
+            try:
+                await self.status_msg.edit_text(
+                    f"{self.caption}\n{create_progress_bar(pct)}",
+                    parse_mode=constants.ParseMode.HTML
+                )
+            except RetryAfter as e:
+                logger.warning(f"Flood control on progress edit, waiting {e.retry_after}s")
+                await asyncio.sleep(e.retry_after)
+                continue
+            except TelegramError as e:
+                # e.g. the user deleted the status message; further
+                # edits would keep failing, so stop reporting quietly
+                logger.warning(f"Progress edit failed, stopping reporter: {str(e)}")
+                return
+            logger.info(f"Transfer progress: {pct}%")
+            self.last_sent_pct = pct
+            self.last_sent_ts = now
 
-def create_progress_bar(percentage, width=20):
-    """Create a visually appealing progress bar with stars"""
-    filled = int(width * percentage / 100)
-    empty = width - filled
-    progress = "⭐" * filled + "☆" * empty
-    return f"[{progress}] {percentage}%"
+async def stream_mega_to_gofile(cdn_url, upload_url, file_name, decryptor, total_size, reporter):
+    """Pipe the Mega download straight into the Gofile upload: the
+    multipart body is produced chunk by chunk as the download arrives,
+    decrypting in-line and bumping the progress reporter"""
+    session = await get_http_session()
+    # No total deadline (files can be huge), but a dead socket must
+    # raise instead of hanging the job and its semaphore slot forever
+    timeout = aiohttp.ClientTimeout(total=None, sock_connect=30, sock_read=60)
+    async with session.get(cdn_url, timeout=timeout) as cdn_resp:
+        cdn_resp.raise_for_status()
+
+        async def chunks():
+            transferred = 0
+            async for chunk in cdn_resp.content.iter_chunked(1 << 20):
+                data = decryptor.decrypt(chunk)
+                transferred += len(data)
+                if total_size > 0:
+                    reporter.latest_pct = min(100, int(transferred / total_size * 100))
+                yield data
+
+        writer = aiohttp.MultipartWriter('form-data')
+        part = writer.append(chunks(), {'Content-Type': 'application/octet-stream'})
+        part.set_content_disposition('form-data', name='file', filename=file_name)
+
+        async with session.post(upload_url, data=writer, timeout=timeout) as upload_resp:
+            if upload_resp.status >= 400:
+                # Server may have rotated out; next job gets a fresh pick
+                invalidate_gofile_server()
+            upload_resp.raise_for_status()
+            return await upload_resp.json()
+
+# Caption templates, built once at import; only the volatile admin
+# list is interpolated per call via .format(admins=...)
+RESTRICTED_CAPTION = (
+    "🔒 <b>Access Restricted</b>\n\n"
+    "You need to be an admin to use this bot.\n"
+    "Contact the main admin for access:\n"
+    f"<code>{MAIN_ADMIN_ID}</code>\n\n"
+    "⚠️ Only the main admin can grant access"
+)
+ADMIN_CAPTION_TPL = (
+    "🚀 <b>Mega to Gofile Uploader Bot</b>\n\n"
+    "Send <code>/gofile [mega_link]</code> to upload files\n\n"
+    "🔐 <b>Admin Management (MAIN ADMIN ONLY)</b>\n"
+    "• <code>/admin [user_id]</code> - Add regular admin\n"
+    "• <code>/remove [user_id]</code> - Remove regular admin\n\n"
+    f"👑 <b>Main Admin</b>: <code>{MAIN_ADMIN_ID}</code>\n"
+    "👥 <b>Regular Admins</b>: {admins}"
+)
+# Markdown fallbacks for when the animation send fails
+RESTRICTED_CAPTION_MD = RESTRICTED_CAPTION.replace("<b>", "**").replace("</b>", "**")
+ADMIN_CAPTION_MD_TPL = ADMIN_CAPTION_TPL.replace("<b>", "**").replace("</b>", "**")
+
+DENIED_MANAGE_HTML = (
+    "❌ <b>ACCESS DENIED!</b>\n\n"
+    "Only the main admin can manage admins.\n"
+    f"Main Admin ID: <code>{MAIN_ADMIN_ID}</code>"
+)
+DENIED_GOFILE_HTML = (
+    "❌ <b>Access denied!</b>\n\n"
+    "You need to be an admin to use this bot.\n"
+    f"Contact main admin: <code>{MAIN_ADMIN_ID}</code>"
+)
+
+# Public Mega file links: handle segment plus decryption key.
+# Folder links are excluded on purpose — the transfer path only
+# handles single files.
+_MEGA_RE = re.compile(
+    r'^https://mega\.(?:nz|io)/file/[A-Za-z0-9_-]+#[A-Za-z0-9_-]+$'
+)
+
+# Telegram file_id of the welcome animation, captured after the first
+# successful send so later /start calls skip the remote URL fetch
+_welcome_file_id = None
+
+# Cap simultaneous transfers bot-wide and keep each user's jobs FIFO
+MAX_CONCURRENT_JOBS = int(os.getenv("MAX_CONCURRENT_JOBS", "4"))
+_job_sem = asyncio.Semaphore(MAX_CONCURRENT_JOBS)
+_user_queues = defaultdict(asyncio.Lock)
+
+# All 101 possible progress bars, prebuilt once; the status-edit path
+# then just indexes instead of re-concatenating star strings
+_BARS = [
+    f"[{'⭐' * (pct * 20 // 100)}{'☆' * (20 - pct * 20 // 100)}] {pct}%"
+    for pct in range(101)
+]
+
+def create_progress_bar(percentage):
+    """Look up the prebuilt star progress bar for a percentage"""
+    return _BARS[max(0, min(100, percentage))]
 
 async def send_alive_notification(application: Application):
     """Send alive notification to all admins when bot starts"""
-    if not ADMINS:
+    if not _admins:
         logger.warning("No admins configured for alive notification")
         return
-    
+
     message = (
         "Hey Arsynox Bot is Alive 🥳\n\n"
         "✅ Bot is ready to process Mega links\n"
         "✅ Admin management active (MAIN ADMIN ONLY)\n"
         f"👑 Main Admin: {MAIN_ADMIN_ID}\n"
-        f"👥 Regular Admins: {', '.join(map(str, ADDITIONAL_ADMINS)) if ADDITIONAL_ADMINS else 'None'}"
+        f"👥 Regular Admins: {render_admins()}"
     )
-    
-    for admin_id in ADMINS:
-        try:
-            await application.bot.send_message(
+
+    # Fire all sends concurrently; startup cost is one round-trip, not
+    # one per admin. The rate limiter keeps the burst within limits.
+    admin_ids = list(_admins)
+    results = await asyncio.gather(
+        *(
+            application.bot.send_message(
                 chat_id=admin_id,
                 text=message,
                 disable_notification=True
             )
+            for admin_id in admin_ids
+        ),
+        return_exceptions=True
+    )
+    for admin_id, result in zip(admin_ids, results):
+        if isinstance(result, Exception):
+            logger.error(f"Failed to send alive message to {admin_id}: {str(result)}")
+        else:
             logger.info(f"Sent alive notification to admin {admin_id}")
-        except Exception as e:
-            logger.error(f"Failed to send alive message to {admin_id}: {str(e)}")
 
 async def start(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Send welcome message with animation"""
     user_id = update.effective_user.id
     logger.info(f"User {user_id} started the bot")
     
-    # Create caption based on user status
-    if user_id not in ADMINS:
-        caption = (
-            "🔒 <b>Access Restricted</b>\n\n"
-            "You need to be an admin to use this bot.\n"
-            "Contact the main admin for access:\n"
-            f"<code>{MAIN_ADMIN_ID}</code>\n\n"
-            "⚠️ Only the main admin can grant access"
-        )
+    # Pick prebuilt caption based on user status
+    if not is_admin(user_id):
+        caption = RESTRICTED_CAPTION
+        fallback = RESTRICTED_CAPTION_MD
     else:
-        caption = (
-            "🚀 <b>Mega to Gofile Uploader Bot</b>\n\n"
-            "Send <code>/gofile [mega_link]</code> to upload files\n\n"
-            "🔐 <b>Admin Management (MAIN ADMIN ONLY)</b>\n"
-            "• <code>/admin [user_id]</code> - Add regular admin\n"
-            "• <code>/remove [user_id]</code> - Remove regular admin\n\n"
-            f"👑 <b>Main Admin</b>: <code>{MAIN_ADMIN_ID}</code>\n"
-            f"👥 <b>Regular Admins</b>: {', '.join(map(str, ADDITIONAL_ADMINS)) if ADDITIONAL_ADMINS else 'None'}"
-        )
-    
+        caption = ADMIN_CAPTION_TPL.format(admins=render_admins())
+        fallback = ADMIN_CAPTION_MD_TPL.format(admins=render_admins())
+
+    global _welcome_file_id
     try:
-        # Send animation with caption
-        await context.bot.send_animation(
+        # Send animation with caption, reusing the cached file_id after
+        # the first upload so Telegram doesn't refetch the URL
+        msg = await context.bot.send_animation(
             chat_id=update.effective_chat.id,
-            animation=WELCOME_ANIMATION_URL,
+            animation=_welcome_file_id or WELCOME_ANIMATION_URL,
             caption=caption,
             parse_mode=constants.ParseMode.HTML,
             disable_notification=True
         )
+        if _welcome_file_id is None and msg.animation:
+            _welcome_file_id = msg.animation.file_id
         logger.info(f"Sent welcome animation to user {user_id}")
     except Exception as e:
         logger.error(f"Animation error for user {user_id}: {str(e)}")
         # Fallback to text message if animation fails
         await update.message.reply_text(
-            caption.replace("<b>", "**").replace("</b>", "**"),
+            fallback,
             parse_mode=constants.ParseMode.MARKDOWN_V2
         )
 
@@ -118,9 +402,7 @@ async def add_admin(update: Update, context: ContextTypes.DEFAULT_TYPE):
     # ONLY main admin can add admins
     if user_id != MAIN_ADMIN_ID:
         await update.message.reply_text(
-            "❌ <b>ACCESS DENIED!</b>\n\n"
-            "Only the main admin can add new admins.\n"
-            f"Main Admin ID: <code>{MAIN_ADMIN_ID}</code>",
+            DENIED_MANAGE_HTML,
             parse_mode=constants.ParseMode.HTML
         )
         logger.warning(f"User {user_id} (not main admin) attempted to add admin")
@@ -141,20 +423,19 @@ async def add_admin(update: Update, context: ContextTypes.DEFAULT_TYPE):
             await update.message.reply_text("👑 You're already the main admin!")
             return
             
-        if new_admin_id in ADDITIONAL_ADMINS:
+        if _admins.get(new_admin_id) == 'regular':
             await update.message.reply_text(
                 f"⚠️ User <code>{new_admin_id}</code> is already a regular admin!",
                 parse_mode=constants.ParseMode.HTML
             )
             return
-        
-        ADDITIONAL_ADMINS.add(new_admin_id)
-        ADMINS.add(new_admin_id)  # Add to full admin list for bot access
-        
+
+        await grant_admin(new_admin_id)
+
         await update.message.reply_text(
             f"✅ Added regular admin: <code>{new_admin_id}</code>\n\n"
             f"👑 Main Admin: <code>{MAIN_ADMIN_ID}</code>\n"
-            f"👥 Regular Admins: {', '.join(map(str, ADDITIONAL_ADMINS))}",
+            f"👥 Regular Admins: {render_admins()}",
             parse_mode=constants.ParseMode.HTML
         )
         logger.info(f"Main admin {user_id} added {new_admin_id} as regular admin")
@@ -174,9 +455,7 @@ async def remove_admin(update: Update, context: ContextTypes.DEFAULT_TYPE):
     # ONLY main admin can remove admins
     if user_id != MAIN_ADMIN_ID:
         await update.message.reply_text(
-            "❌ <b>ACCESS DENIED!</b>\n\n"
-            "Only the main admin can remove admins.\n"
-            f"Main Admin ID: <code>{MAIN_ADMIN_ID}</code>",
+            DENIED_MANAGE_HTML,
             parse_mode=constants.ParseMode.HTML
         )
         logger.warning(f"User {user_id} (not main admin) attempted to remove admin")
@@ -197,20 +476,19 @@ async def remove_admin(update: Update, context: ContextTypes.DEFAULT_TYPE):
             await update.message.reply_text("👑 Cannot remove the main admin!")
             return
         
-        if target_id not in ADDITIONAL_ADMINS:
+        if _admins.get(target_id) != 'regular':
             await update.message.reply_text(
                 f"⚠️ User <code>{target_id}</code> is not a regular admin!",
                 parse_mode=constants.ParseMode.HTML
             )
             return
-        
-        ADDITIONAL_ADMINS.remove(target_id)
-        ADMINS.remove(target_id)  # Remove from full admin list
-        
+
+        await revoke_admin(target_id)
+
         await update.message.reply_text(
             f"🗑️ Removed regular admin: <code>{target_id}</code>\n\n"
             f"👑 Main Admin: <code>{MAIN_ADMIN_ID}</code>\n"
-            f"👥 Regular Admins: {', '.join(map(str, ADDITIONAL_ADMINS)) if ADDITIONAL_ADMINS else 'None'}",
+            f"👥 Regular Admins: {render_admins()}",
             parse_mode=constants.ParseMode.HTML
         )
         logger.info(f"Main admin {user_id} removed {target_id} as regular admin")
@@ -227,11 +505,9 @@ async def handle_gofile(update: Update, context: ContextTypes.DEFAULT_TYPE):
     user_id = update.effective_user.id
     logger.info(f"User {user_id} initiated /gofile command")
     
-    if user_id not in ADMINS:
+    if not is_admin(user_id):
         await update.message.reply_text(
-            "❌ <b>Access denied!</b>\n\n"
-            "You need to be an admin to use this bot.\n"
-            f"Contact main admin: <code>{MAIN_ADMIN_ID}</code>",
+            DENIED_GOFILE_HTML,
             parse_mode=constants.ParseMode.HTML
         )
         logger.warning(f"Non-admin user {user_id} attempted to use /gofile")
@@ -244,212 +520,142 @@ async def handle_gofile(update: Update, context: ContextTypes.DEFAULT_TYPE):
         )
         return
     
-    mega_link = " ".join(context.args)  # Handle links with spaces
+    mega_link = context.args[0].strip()
     logger.info(f"User {user_id} provided Mega link: {mega_link}")
-    
-    if not (mega_link.startswith("https://mega.nz/") or mega_link.startswith("https://mega.io/")):
+
+    if not _MEGA_RE.match(mega_link):
         await update.message.reply_text(
             "❌ <b>Invalid Mega link!</b>\n\n"
-            "Must start with <code>https://mega.nz/</code> or <code>https://mega.io/</code>",
+            "Expected <code>https://mega.nz/file/ID#KEY</code> "
+            "or <code>https://mega.io/file/ID#KEY</code>",
             parse_mode=constants.ParseMode.HTML
         )
         logger.warning(f"User {user_id} provided invalid Mega link format")
         return
 
+    # Queue behind the user's earlier jobs and the global transfer cap
+    user_lock = _user_queues[user_id]
+    if user_lock.locked() or _job_sem.locked():
+        await update.message.reply_text(
+            "⏳ <b>Transfer queued</b> — it will start when a slot frees up.",
+            parse_mode=constants.ParseMode.HTML
+        )
+        logger.info(f"Job for user {user_id} queued (all slots busy)")
+
+    async with user_lock:
+        async with _job_sem:
+            await _run_gofile_job(update, mega_link)
+
+async def _report_error(update, status_msg, summary, exc):
+    """Tell the user a job failed, HTML-escaping the exception text"""
+    text = f"❌ <b>{summary}:</b> <code>{html.escape(str(exc))}</code>"
+    try:
+        if status_msg is not None:
+            await status_msg.edit_text(text, parse_mode=constants.ParseMode.HTML)
+            return
+    except TelegramError:
+        pass
+    try:
+        await update.message.reply_text(text, parse_mode=constants.ParseMode.HTML)
+    except TelegramError as e:
+        logger.error(f"Failed to report error to user: {str(e)}")
+
+async def _run_gofile_job(update: Update, mega_link: str):
+    """Run one Mega -> Gofile transfer end to end"""
+    user_id = update.effective_user.id
+    status_msg = None
     try:
         # Initial status message
         status_msg = await update.message.reply_text(
-            "📥 <b>Starting download from Mega...</b>\n"
+            "📥 <b>Starting transfer from Mega...</b>\n"
             "▰▰▰▰▰▰▰▰▰▰ 0%",
             parse_mode=constants.ParseMode.HTML
         )
         logger.info(f"Started processing for user {user_id}")
-        
-        # Download from Mega with progress
+
+        # Resolve the Mega CDN URL so we can stream it straight to Gofile.
+        # The SDK's API request is synchronous, so keep it off the loop.
         mega = Mega()
-        with tempfile.TemporaryDirectory() as temp_dir:
-            logger.info(f"Created temporary directory: {temp_dir}")
-            
-            # Get file info to show progress
-            logger.info("Fetching file info from Mega...")
-            file_info = mega.get_public_file(mega_link)
-            total_size = file_info['s']
-            file_name = file_info['at']['n']
-            logger.info(f"File info - Name: {file_name}, Size: {total_size} bytes")
-            
-            # Start download in background thread
-            downloaded = 0
-            download_complete = asyncio.Event()
-            lock = asyncio.Lock()
-            
-            def download_thread():
-                nonlocal downloaded
-                try:
-                    # Download file and track progress
-                    logger.info("Starting download from Mega...")
-                    mega.download_url(mega_link, dest_path=temp_dir)
-                    logger.info("Download completed successfully")
-                    download_complete.set()
-                except Exception as e:
-                    logger.error(f"Download failed: {str(e)}")
-                    with lock:
-                        downloaded = -1  # Error state
-                    download_complete.set()
-            
-            # Start download thread
-            download_task = threading.Thread(target=download_thread)
-            download_task.daemon = True
-            download_task.start()
-            logger.info("Download thread started")
-            
-            # Track download progress
-            last_update = 0
-            while not download_complete.is_set():
-                await asyncio.sleep(1)
-                current_size = sum(os.path.getsize(os.path.join(temp_dir, f)) 
-                                  for f in os.listdir(temp_dir) 
-                                  if os.path.isfile(os.path.join(temp_dir, f)))
-                
-                async with lock:
-                    downloaded = current_size
-                
-                if total_size > 0:
-                    progress = min(100, int(downloaded / total_size * 100))
-                    
-                    # Update only when progress changes significantly
-                    if progress != last_update and progress % 5 == 0:
-                        progress_bar = create_progress_bar(progress)
-                        await status_msg.edit_text(
-                            f"📥 <b>Downloading from Mega:</b> {file_name}\n"
-                            f"{progress_bar}",
-                            parse_mode=constants.ParseMode.HTML
-                        )
-                        logger.info(f"Download progress: {progress}%")
-                        last_update = progress
-            
-            # Final download status
-            if downloaded == -1:
-                logger.error("Download failed with error state")
-                raise Exception("Download failed")
-                
-            downloaded_path = os.path.join(temp_dir, file_name)
-            logger.info(f"File downloaded to: {downloaded_path}")
-            
-            # Upload to Gofile with progress
-            await status_msg.edit_text(
-                "⏫ <b>Starting upload to Gofile...</b>\n"
-                "▰▰▰▰▰▰▰▰▰▰ 0%",
-                parse_mode=constants.ParseMode.HTML
-            )
-            logger.info("Starting upload to Gofile...")
-            
-            # Get upload server
-            logger.info("Fetching Gofile server info...")
-            server_resp = requests.get("https://api.gofile.io/servers", timeout=10)
-            server_resp.raise_for_status()
-            server = server_resp.json()["data"]["servers"][0]["name"]
-            logger.info(f"Using Gofile server: {server}")
-            
-            # Prepare upload with progress tracking
-            upload_url = f"https://{server}.gofile.io/uploadFile"
-            file_size = os.path.getsize(downloaded_path)
-            uploaded = 0
-            upload_complete = asyncio.Event()
-            
-            # Custom file-like object to track upload progress
-            class ProgressFile:
-                def __init__(self, file):
-                    self.file = file
-                    self.uploaded = 0
-                
-                def read(self, size=-1):
-                    nonlocal uploaded
-                    chunk = self.file.read(size)
-                    if chunk:
-                        self.uploaded += len(chunk)
-                        uploaded = self.uploaded
-                    return chunk
-            
-            # Start upload in background thread
-            def upload_thread():
-                try:
-                    with open(downloaded_path, 'rb') as f:
-                        logger.info("Starting file upload...")
-                        progress_file = ProgressFile(f)
-                        files = {'file': (file_name, progress_file)}
-                        response = requests.post(
-                            upload_url,
-                            files=files,
-                            timeout=300
+        logger.info("Fetching file info from Mega...")
+        file_name, total_size, cdn_url, decryptor = await asyncio.to_thread(
+            resolve_mega_file, mega, mega_link
+        )
+        logger.info(f"File info - Name: {file_name}, Size: {total_size} bytes")
+
+        # Run the transfer on the event loop; the reporter task turns
+        # the coalesced progress value into occasional edits. Transient
+        # network errors retry with fresh CDN URL and cipher state.
+        reporter = ProgressReporter(
+            status_msg,
+            f"🔁 <b>Transferring to Gofile:</b> {html.escape(file_name)}"
+        )
+        reporter_task = asyncio.create_task(reporter.run())
+        logger.info("Starting Mega -> Gofile transfer...")
+        try:
+            async for attempt in AsyncRetrying(
+                stop=stop_after_attempt(3),
+                wait=wait_exponential(multiplier=1, max=30),
+                retry=retry_if_exception_type(aiohttp.ClientError),
+                reraise=True
+            ):
+                with attempt:
+                    if attempt.retry_state.attempt_number > 1:
+                        logger.warning(
+                            f"Retrying transfer (attempt {attempt.retry_state.attempt_number})"
                         )
-                        response.raise_for_status()
-                        logger.info("Upload completed successfully")
-                        return response.json()
-                except Exception as e:
-                    logger.error(f"Upload failed: {str(e)}")
-                    with lock:
-                        uploaded = -1  # Error state
-                    upload_complete.set()
-                    raise e
-            
-            # Start upload thread
-            upload_task = threading.Thread(target=upload_thread)
-            upload_task.daemon = True
-            upload_task.start()
-            logger.info("Upload thread started")
-            
-            # Track upload progress
-            last_update = 0
-            while not upload_complete.is_set():
-                await asyncio.sleep(1)
-                async with lock:
-                    current_uploaded = uploaded
-                
-                if file_size > 0:
-                    progress = min(100, int(current_uploaded / file_size * 100))
-                    
-                    # Update only when progress changes significantly
-                    if progress != last_update and progress % 5 == 0:
-                        progress_bar = create_progress_bar(progress)
-                        await status_msg.edit_text(
-                            f"⏫ <b>Uploading to Gofile:</b> {file_name}\n"
-                            f"{progress_bar}",
-                            parse_mode=constants.ParseMode.HTML
+                        file_name, total_size, cdn_url, decryptor = await asyncio.to_thread(
+                            resolve_mega_file, mega, mega_link
                         )
-                        logger.info(f"Upload progress: {progress}%")
-                        last_update = progress
-            
-            # Get upload result
-            logger.info("Fetching upload result...")
-            upload_resp = upload_task.result()
-            if upload_resp["status"] != "ok":
-                logger.error(f"Gofile API error: {upload_resp.get('data', {}).get('message', 'Unknown error')}")
-                raise Exception(f"Gofile error: {upload_resp.get('data', {}).get('message', 'Unknown error')}")
-            
-            # Send success message
-            download_url = upload_resp["data"]["downloadPage"]
-            await status_msg.edit_text(
-                f"✅ <b>Upload successful!</b>\n\n"
-                f"📁 <b>File:</b> <code>{file_name}</code>\n"
-                f"🔗 <b>Download:</b> <a href='{download_url}'>Link</a>\n\n"
-                f"⭐ <b>Thank you for using Arsynox Bot!</b>",
-                parse_mode=constants.ParseMode.HTML,
-                disable_web_page_preview=False
-            )
-            logger.info(f"Upload completed successfully. Download URL: {download_url}")
+                        reporter.latest_pct = 0
+                    server = await get_gofile_server()
+                    upload_url = f"https://{server}.gofile.io/uploadFile"
+                    upload_resp = await stream_mega_to_gofile(
+                        cdn_url, upload_url, file_name, decryptor, total_size, reporter
+                    )
+        finally:
+            reporter_task.cancel()
+            # Reap the task so an in-flight progress edit can't land
+            # after the final status edit (and so a failed task doesn't
+            # log "exception was never retrieved")
+            await asyncio.gather(reporter_task, return_exceptions=True)
+        if upload_resp["status"] != "ok":
+            logger.error(f"Gofile API error: {upload_resp.get('data', {}).get('message', 'Unknown error')}")
+            raise Exception(f"Gofile error: {upload_resp.get('data', {}).get('message', 'Unknown error')}")
+
+        # Send success message
+        download_url = upload_resp["data"]["downloadPage"]
+        await status_msg.edit_text(
+            f"✅ <b>Upload successful!</b>\n\n"
+            f"📁 <b>File:</b> <code>{html.escape(file_name)}</code>\n"
+            f"🔗 <b>Download:</b> <a href='{download_url}'>Link</a>\n\n"
+            f"⭐ <b>Thank you for using Arsynox Bot!</b>",
+            parse_mode=constants.ParseMode.HTML,
+            disable_web_page_preview=False
+        )
+        logger.info(f"Upload completed successfully. Download URL: {download_url}")
     
+    except RequestError as e:
+        logger.exception(f"Mega API error for user {user_id}: {str(e)}")
+        await _report_error(update, status_msg, "Mega rejected the link", e)
+    except aiohttp.ClientError as e:
+        logger.exception(f"Network error for user {user_id}: {str(e)}")
+        await _report_error(update, status_msg, "Transfer failed after retries", e)
+    except NetworkError as e:
+        # Telegram itself is unreachable; reporting would fail the same way
+        logger.exception(f"Telegram network error for user {user_id}: {str(e)}")
+    except TelegramError as e:
+        logger.exception(f"Telegram API error for user {user_id}: {str(e)}")
+        await _report_error(update, status_msg, "Telegram error", e)
     except Exception as e:
         logger.exception(f"Error processing request: {str(e)}")
-        try:
-            await status_msg.edit_text(
-                f"❌ <b>Error:</b> <code>{str(e)}</code>",
-                parse_mode=constants.ParseMode.HTML
-            )
-        except:
-            await update.message.reply_text(
-                f"❌ <b>Error:</b> <code>{str(e)}</code>",
-                parse_mode=constants.ParseMode.HTML
-            )
+        await _report_error(update, status_msg, "Error", e)
+
+async def unknown_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Short reply for commands the bot doesn't know (no animation)"""
+    logger.info(f"User {update.effective_user.id} sent an unknown command")
+    await update.message.reply_text(
+        "❓ Unknown command. Send /start to see what this bot can do."
+    )
 
 def main():
     """Initialize and run the bot"""
@@ -466,21 +672,54 @@ def main():
     logger.info(f"Main Admin ID: {MAIN_ADMIN_ID}")
     logger.info(f"Welcome Animation URL: {WELCOME_ANIMATION_URL}")
     
-    app = Application.builder().token(BOT_TOKEN).build()
-    
-    # Command handlers
+    # Rate limiter keeps us under Telegram's 30 msg/s bot-wide cap; the
+    # bigger pool stops concurrent edits from exhausting connections
+    app = (
+        Application.builder()
+        .token(BOT_TOKEN)
+        .concurrent_updates(True)
+        .rate_limiter(AIORateLimiter(overall_max_rate=30, overall_time_period=1, max_retries=3))
+        .connection_pool_size(256)
+        .pool_timeout(30)
+        .get_updates_connection_pool_size(1)
+        .build()
+    )
+
+    # Command handlers; /gofile runs non-blocking so long transfers
+    # don't stall /start, /admin etc.
     app.add_handler(CommandHandler("start", start))
     app.add_handler(CommandHandler("admin", add_admin))
     app.add_handler(CommandHandler("remove", remove_admin))
-    app.add_handler(CommandHandler("gofile", handle_gofile))
-    app.add_handler(MessageHandler(filters.COMMAND, start))
+    app.add_handler(CommandHandler("gofile", handle_gofile, block=False))
+    app.add_handler(MessageHandler(
+        filters.COMMAND & ~filters.Regex(r'^/(start|admin|remove|gofile)(@|\s|$)'),
+        unknown_command
+    ))
     
-    # Send alive notification to admins
+    # Load persisted admins, then notify them the bot is up
     logger.info("Bot is starting up...")
-    app.post_init = lambda app: send_alive_notification(app)
+
+    async def on_startup(application: Application):
+        await init_admin_db()
+        await send_alive_notification(application)
+
+    async def on_shutdown(application: Application):
+        await close_http_session()
+        await close_admin_db()
+
+    app.post_init = on_startup
+    app.post_shutdown = on_shutdown
     
+    # Real long polling: hold getUpdates open for 30s and re-poll
+    # immediately, instead of hammering Telegram with empty requests.
+    # We only handle plain messages, so skip other update types too.
     logger.info("Starting bot polling...")
-    app.run_polling()
+    app.run_polling(
+        timeout=30,
+        poll_interval=0,
+        drop_pending_updates=True,
+        allowed_updates=["message"]
+    )
 
 if __name__ == "__main__":
     main()